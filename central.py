@@ -3,73 +3,127 @@ Central Server – receives data from Drone and displays it in a GUI dashboard.
 """
 
 import argparse
+import functools
+import itertools
 import socket
 import re
 import json
+import selectors
 import threading
 import time
 import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 from collections import deque
 
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to stdlib json
+    orjson = None
+
+jsonLoads = orjson.loads if orjson is not None else json.loads
+
 serverState = {
-    "aggregated": [],
-    "logs": []
+    "aggregated": deque(maxlen=100),
+    "logs": deque(maxlen=500),
+    "latest": {}
 }
 stateLock = threading.Lock()
 
+# size of the receive buffer shared by all drone connections
+RECV_BUFSIZE = 65536
+
+# (epoch second, formatted time) of the most recent log timestamp
+_tsCache = (0, "")
+
+# trailing number of a sensor id, used for numeric sorting
+_SID_TAIL_RE = re.compile(r"(\d+)$")
+
+
+@functools.lru_cache(maxsize=None)
+def keyfn(name):
+    """
+    Numeric sort key for sensor ids ("sensor10" sorts after "sensor9").
+    """
+    m = _SID_TAIL_RE.search(name)
+    return int(m.group(1)) if m else float('inf')
+
+
+def timestampNow() -> str:
+    """
+    Return the local time as HH:MM:SS, formatting it at most once per second.
+    """
+    global _tsCache
+    epoch = int(time.time())
+    if epoch != _tsCache[0]:
+        _tsCache = (epoch, time.strftime('%H:%M:%S', time.localtime(epoch)))
+    return _tsCache[1]
+
 
 def logRecord(message: str):
     """
     Append a timestamped log message to the serverState logs,
-    trimming the list to the most recent 500 entries.
+    which keep only the most recent 500 entries.
     """
-    entryTime = time.strftime('%H:%M:%S')
+    entryTime = timestampNow()
     with stateLock:
         serverState["logs"].append(f"{entryTime}  {message}")
-        if len(serverState["logs"]) > 500:
-            serverState["logs"] = serverState["logs"][-500:]
 
 
-def processDrone(droneSocket: socket.socket, addr):
+def closeDrone(sel: selectors.BaseSelector, droneSocket: socket.socket, conn: dict):
+    """
+    Unregister and close a drone connection.
+    """
+    sel.unregister(droneSocket)
+    droneSocket.close()
+    logRecord(f"Drone {conn['addr']} disconnected")
+
+
+def processDrone(sel: selectors.BaseSelector, droneSocket: socket.socket, conn: dict,
+                 recvView: memoryview):
     """
-    Handle a drone connection: receive newline-delimited JSON packets,
+    Handle a readable drone connection: receive newline-delimited JSON packets,
     update aggregated data, log events and handle disconnections/errors.
+    Data is read into the reusable recvView; the partial line buffer is kept
+    in the per-connection conn dict.
     """
-    logRecord(f"Drone connected from {addr}")
-    droneSocket.settimeout(1.0)
-    dataBuffer = ""
+    dataBuffer = conn["buffer"]
+    lineStart = conn["lineStart"]
 
     try:
+        received = droneSocket.recv_into(recvView)
+        if received == 0:
+            closeDrone(sel, droneSocket, conn)
+            return
+        dataBuffer += recvView[:received]
         while True:
-            try:
-                dataPiece = droneSocket.recv(1024).decode()
-            except socket.timeout:
-                dataPiece = None
-            if dataPiece is None:
-                pass
-            elif dataPiece == "":
+            lineEnd = dataBuffer.find(b"\n", lineStart)
+            if lineEnd < 0:
                 break
-            else:
-                dataBuffer += dataPiece
-                while "\n" in dataBuffer:
-                    jsonLine, dataBuffer = dataBuffer.split("\n", 1)
-                    try:
-                        data = json.loads(jsonLine)
-                        with stateLock:
-                            serverState["aggregated"].append(data)
-                            if len(serverState["aggregated"]) > 100:
-                                serverState["aggregated"] = serverState["aggregated"][-100:]
-                        logRecord(f"Received from drone: {data}")
-
-                    except json.JSONDecodeError as e:
-                        logRecord(f"Invalid JSON from drone: {e}")
-
+            jsonLine = dataBuffer[lineStart:lineEnd]
+            lineStart = lineEnd + 1
+            try:
+                data = jsonLoads(jsonLine)
+                if not (isinstance(data, dict) and "sensor_id" in data):
+                    logRecord(f"Invalid packet from drone (no sensor_id): {data}")
+                    continue
+                with stateLock:
+                    serverState["aggregated"].append(data)
+                    serverState["latest"][data["sensor_id"]] = data
+                logRecord(f"Received from drone: {data}")
+
+            except json.JSONDecodeError as e:
+                logRecord(f"Invalid JSON from drone: {e}")
+        # drop consumed lines only once enough have piled up
+        if lineStart > 4096:
+            del dataBuffer[:lineStart]
+            lineStart = 0
+        conn["lineStart"] = lineStart
+
+    except (BlockingIOError, InterruptedError):
+        pass
     except Exception as e:
         logRecord(f"Connection error: {e}")
-    finally:
-        droneSocket.close()
-        logRecord(f"Drone {addr} disconnected")
+        closeDrone(sel, droneSocket, conn)
 
 
 def csGUI():
@@ -142,23 +196,53 @@ def csGUI():
         cnv.bind("<B1-Motion>", lambda e,
                  c=cnv: c.scan_dragto(e.x, e.y, gain=1))
 
+        # persistent items, moved with coords() on every redraw: each panel
+        # holds exactly two lines and two labels however many samples it shows
         graph_widgets[sid] = {
             "canvas": cnv,
             "temp_buf": deque(maxlen=max_len),
             "hum_buf":  deque(maxlen=max_len),
-            "zoom": 1.0
+            "vmin": None,
+            "vmax": None,
+            "line_t": cnv.create_line(0, 0, 0, 0, fill="red", width=2),
+            "line_h": cnv.create_line(0, 0, 0, 0, fill="blue", width=2),
+            "label_t": cnv.create_text(0, 0, text="", fill="red",
+                                       font=("Arial", 9, "bold"), anchor="w"),
+            "label_h": cnv.create_text(0, 0, text="", fill="blue",
+                                       font=("Arial", 9, "bold"), anchor="w"),
+            "zoom": 1.0,
+            # canvas size, kept current by the <Configure> binding below
+            "w": 1,
+            "h": 1,
+            "xs": [],
+            "xs_key": None
         }
 
+        def on_resize(e, s=sid):
+            graph_widgets[s]["w"], graph_widgets[s]["h"] = e.width, e.height
+        cnv.bind("<Configure>", on_resize)
+
+    def push_sample(sid: str, buf_key: str, value):
+        """Append to a panel buffer, keeping the running min/max up to date."""
+        gw = graph_widgets[sid]
+        buf = gw[buf_key]
+        evicted = buf[0] if len(buf) == buf.maxlen else None
+        buf.append(value)
+        if gw["vmin"] is None:
+            gw["vmin"] = gw["vmax"] = value
+        elif evicted is not None and evicted in (gw["vmin"], gw["vmax"]):
+            # an extremum fell out of the window, rescan both buffers
+            allv = list(itertools.chain(gw["temp_buf"], gw["hum_buf"]))
+            gw["vmin"], gw["vmax"] = min(allv), max(allv)
+        else:
+            gw["vmin"] = min(gw["vmin"], value)
+            gw["vmax"] = max(gw["vmax"], value)
+
     def zoom(sid: str, factor: float):
         gw = graph_widgets[sid]
         gw["zoom"] *= factor
         redraw_panel(sid)
 
-    # numeric sort helper
-    def keyfn(name):
-        m = re.search(r'(\d+)$', name)
-        return int(m.group(1)) if m else float('inf')
-
     def redraw_panel(sid: str):
         """Redraw only one panel with current zoom."""
         gw = graph_widgets[sid]
@@ -167,91 +251,98 @@ def csGUI():
         buf_h = gw["hum_buf"]
         z = gw["zoom"]
 
-        c.delete("all")
-        w = c.winfo_width()
-        h = c.winfo_height()
-        # scale drawing by zoom
-        def sx(x): return x * z
-        def sy(y): return y * z
+        w = gw["w"]
+        h = gw["h"]
 
-        allv = list(buf_t) + list(buf_h)
-        vmin, vmax = (min(allv), max(allv)) if allv else (0, 1)
+        vmin, vmax = (gw["vmin"], gw["vmax"]) if gw["vmin"] is not None else (0, 1)
         if vmin == vmax:
             vmax += 1
-
-        # temperature line
-        pts_t = [
-            (sx(i * w/(max_len-1)), sy(h - ((v-vmin)/(vmax-vmin))*h))
-            for i, v in enumerate(buf_t)
-        ]
-        for i in range(len(pts_t)-1):
-            c.create_line(*pts_t[i], *pts_t[i+1], fill="red", width=2)
-
-        # humidity line
-        pts_h = [
-            (sx(i * w/(max_len-1)), sy(h - ((v-vmin)/(vmax-vmin))*h))
-            for i, v in enumerate(buf_h)
-        ]
-        for i in range(len(pts_h)-1):
-            c.create_line(*pts_h[i], *pts_h[i+1], fill="blue", width=2)
-
-        # labels
-        if pts_t:
-            x, y = pts_t[-1]
-            c.create_text(x+5, y-10, text=f"{buf_t[-1]:.1f}°C",
-                          fill="red", font=("Arial", 9, "bold"), anchor="w")
-        if pts_h:
-            x, y = pts_h[-1]
-            c.create_text(x+5, y+10, text=f"{buf_h[-1]:.1f}%",
-                          fill="blue", font=("Arial", 9, "bold"), anchor="w")
+        # scale drawing by zoom; x positions only change with size or zoom
+        if gw["xs_key"] != (w, z):
+            xstep = w / (max_len - 1) * z
+            gw["xs"] = [i * xstep for i in range(max_len)]
+            gw["xs_key"] = (w, z)
+        xs = gw["xs"]
+        yscale = h / (vmax - vmin) * z
+        yoff = h * z + vmin * yscale
+
+        def trace(buf):
+            # flat [x0, y0, x1, y1, ...] built with slice assignment
+            n = len(buf)
+            pts = [0.0] * (2 * n)
+            pts[0::2] = xs[:n]
+            pts[1::2] = [yoff - v * yscale for v in buf]
+            return pts
+
+        def place(line, label, pts, text, dy):
+            # a line needs at least two points
+            if len(pts) >= 4:
+                c.coords(line, *pts)
+            c.coords(label, pts[-2] + 5, pts[-1] + dy)
+            c.itemconfigure(label, text=text)
+
+        # temperature line + label
+        if buf_t:
+            place(gw["line_t"], gw["label_t"], trace(buf_t),
+                  f"{buf_t[-1]:.1f}°C", -10)
+        # humidity line + label
+        if buf_h:
+            place(gw["line_h"], gw["label_h"], trace(buf_h),
+                  f"{buf_h[-1]:.1f}%", 10)
 
         # update scrollregion
         c.configure(scrollregion=(0, 0, w*z, h*z))
 
     def refresh():
+        # take a shallow snapshot under the lock, do all Tk work without it
         with stateLock:
-            # Latest readings
-            readingBox.configure(state="normal")
-            readingBox.delete("1.0", "end")
-            for e in serverState["aggregated"][-10:]:
-                line = (f"{e['timestamp']} | {e['sensor_id']} | "
-                        f"T={e.get('avg_temp', e.get('temperature', '?'))}°C "
-                        f"H={e.get('avg_hum',  e.get('humidity', '?'))}%")
-                if "anomaly_count" in e:
-                    line += f" | Anomalies={e['anomaly_count']}"
-                readingBox.insert("end", line + "\n")
-            readingBox.configure(state="disabled")
-
-            # Event log
-            logBox.configure(state="normal")
-            logBox.delete("1.0", "end")
-            for l in serverState["logs"][-100:]:
-                tag = "anom" if "Anomaly" in l or l.startswith("⚠️") else None
-                if tag:
-                    logBox.insert("end", l + "\n", tag)
-                else:
-                    logBox.insert("end", l + "\n")
-            logBox.configure(state="disabled")
-
-            # Graph panels
-            sensors = sorted({e["sensor_id"]
-                             for e in serverState["aggregated"]}, key=keyfn)
-            for sid in sensors:
-                if sid not in graph_widgets:
-                    create_graph_panel(sid)
-
-                # push latest into buffer
-                latest = next((x for x in reversed(
-                    serverState["aggregated"]) if x["sensor_id"] == sid), {})
-                t = latest.get("avg_temp", latest.get("temperature", None))
-                h = latest.get("avg_hum",  latest.get("humidity",    None))
-                if t is not None:
-                    graph_widgets[sid]["temp_buf"].append(t)
-                if h is not None:
-                    graph_widgets[sid]["hum_buf"].append(h)
-
-                # redraw after data update
-                redraw_panel(sid)
+            aggregated = serverState["aggregated"]
+            recentReadings = list(itertools.islice(
+                aggregated, max(0, len(aggregated) - 10), None))
+            logs = serverState["logs"]
+            recentLogs = list(itertools.islice(logs, max(0, len(logs) - 100), None))
+            sids = {e["sensor_id"] for e in aggregated}
+            latestBySensor = {sid: serverState["latest"].get(sid, {}) for sid in sids}
+
+        # Latest readings
+        readingBox.configure(state="normal")
+        readingBox.delete("1.0", "end")
+        for e in recentReadings:
+            line = (f"{e['timestamp']} | {e['sensor_id']} | "
+                    f"T={e.get('avg_temp', e.get('temperature', '?'))}°C "
+                    f"H={e.get('avg_hum',  e.get('humidity', '?'))}%")
+            if "anomaly_count" in e:
+                line += f" | Anomalies={e['anomaly_count']}"
+            readingBox.insert("end", line + "\n")
+        readingBox.configure(state="disabled")
+
+        # Event log
+        logBox.configure(state="normal")
+        logBox.delete("1.0", "end")
+        for l in recentLogs:
+            tag = "anom" if "Anomaly" in l or l.startswith("⚠️") else None
+            if tag:
+                logBox.insert("end", l + "\n", tag)
+            else:
+                logBox.insert("end", l + "\n")
+        logBox.configure(state="disabled")
+
+        # Graph panels
+        for sid in sorted(latestBySensor, key=keyfn):
+            if sid not in graph_widgets:
+                create_graph_panel(sid)
+
+            # push latest into buffer
+            latest = latestBySensor[sid]
+            t = latest.get("avg_temp", latest.get("temperature", None))
+            h = latest.get("avg_hum",  latest.get("humidity",    None))
+            if t is not None:
+                push_sample(sid, "temp_buf", t)
+            if h is not None:
+                push_sample(sid, "hum_buf", h)
+
+            # redraw after data update
+            redraw_panel(sid)
 
         root.after(1000, refresh)
 
@@ -261,27 +352,58 @@ def csGUI():
 
 def initTCPServer(ip: str, port: int):
     """
-    Initialize a background TCP server thread to accept drone connections,
-    spawning a processDrone thread for each new connection.
+    Initialize a background TCP server thread that accepts drone connections
+    and serves all of them from a single selector loop.
     """
     serverSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     serverSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     serverSocket.bind((ip, port))
     serverSocket.listen()
+    serverSocket.setblocking(False)
     logRecord(f"Central server listening on {ip}:{port}")
 
-    def acceptLoop():
+    sel = selectors.DefaultSelector()
+    # the listening socket is the only one registered without data
+    sel.register(serverSocket, selectors.EVENT_READ)
+    recvView = memoryview(bytearray(RECV_BUFSIZE))
+
+    def acceptDrone():
+        droneSocket, droneAddr = serverSocket.accept()
+        try:
+            droneSocket.setblocking(False)
+            droneSocket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            droneSocket.close()
+            raise
+        logRecord(f"Drone connected from {droneAddr}")
+        sel.register(droneSocket, selectors.EVENT_READ,
+                     {"addr": droneAddr, "buffer": bytearray(), "lineStart": 0})
+
+    def eventLoop():
+        # while accepting is backed off, the monotonic time to resume at
+        resumeAccept = None
         while True:
-            try:
-                droneSocket, droneAddr = serverSocket.accept()
-                droneThread = threading.Thread(
-                    target=processDrone, args=(droneSocket, droneAddr), daemon=True)
-                droneThread.start()
-            except Exception as e:
-                logRecord(f"Failed to accept connection: {e}")
-                time.sleep(1)
-
-    threading.Thread(target=acceptLoop, daemon=True).start()
+            timeout = None
+            if resumeAccept is not None:
+                timeout = max(0.0, resumeAccept - time.monotonic())
+            for key, _ in sel.select(timeout):
+                if key.data is not None:
+                    processDrone(sel, key.fileobj, key.data, recvView)
+                    continue
+                try:
+                    acceptDrone()
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except Exception as e:
+                    logRecord(f"Failed to accept connection: {e}")
+                    # back off accepting only, connected drones keep being served
+                    sel.unregister(serverSocket)
+                    resumeAccept = time.monotonic() + 1
+            if resumeAccept is not None and time.monotonic() >= resumeAccept:
+                sel.register(serverSocket, selectors.EVENT_READ)
+                resumeAccept = None
+
+    threading.Thread(target=eventLoop, daemon=True).start()
 
 
 def main():
@@ -2,7 +2,7 @@
 """
 Drone Gateway – final, no manual-drain button
 --------------------------------------------
-• Accepts many sensor nodes (TCP).
+• Accepts many sensor nodes (TCP) on a single selector loop.
 • Computes 10-sample averages, detects anomalies.
 • Sends summaries to the central server while RUNNING.
 • At ≤15 % battery → listener closes, summaries queued.
@@ -12,7 +12,9 @@ Drone Gateway – final, no manual-drain button
 
 import argparse
 import json
+import math
 import queue
+import selectors
 import socket
 import threading
 import time
@@ -20,12 +22,20 @@ from collections import deque
 from datetime import datetime, timezone
 from tkinter import Tk, ttk, Text, StringVar, END
 
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to stdlib json
+    orjson = None
+
 # thresholds & constants
 TEMP_MIN, TEMP_MAX = 18.0, 27.0
 HUM_MIN,  HUM_MAX = 30.0, 60.0
 BATTERY_STEP_SEC = 1          # drain 1 % every second
 CHARGE_STEP_SEC = 0.2        # charge 1 % every 0.2 s
 GUI_REFRESH_MS = 1000
+WINDOW = 10                   # samples per rolling average
+RECV_BUFSIZE = 65536          # receive buffer shared by all sensor connections
+PACKET_QUEUE_MAX = 10_000     # oldest summaries are dropped beyond this
 
 
 def utc_now() -> str:
@@ -34,18 +44,63 @@ def utc_now() -> str:
     """
     return datetime.now(timezone.utc).isoformat()
 
+
+# (epoch second, formatted time) of the most recent log timestamp
+_ts_cache = (0, "")
+
+
+def ts_now() -> str:
+    """
+    Return the local time as HH:MM:SS, formatting it at most once per second.
+    """
+    global _ts_cache
+    epoch = int(time.time())
+    if epoch != _ts_cache[0]:
+        _ts_cache = (epoch, time.strftime("%H:%M:%S", time.localtime(epoch)))
+    return _ts_cache[1]
+
+
+def encode_line(obj) -> bytes:
+    """
+    Serialize obj as a newline-terminated JSON line.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def tune_socket(sock):
+    """
+    Disable Nagle's algorithm and enable keep-alive on a connection to central.
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    return sock
+
 # rolling stats per sensor
 
 
 class Stats:
     """
-    Maintain rolling statistics for each sensor: store last 10 temperature and humidity readings,
-    compute averages, record last timestamp snippet, and count anomalies.
+    Maintain rolling statistics for each sensor: store last WINDOW temperature and humidity
+    readings, compute averages, record last timestamp snippet, and count anomalies.
     """
+    __slots__ = ("t", "h", "count", "_idx", "_sum_t", "_sum_h",
+                 "avg_t", "avg_h", "fmt_t", "fmt_h", "last", "anom")
+
     def __init__(self):
-        # initialize deques for storing recent readings
-        self.t, self.h = deque(maxlen=10), deque(maxlen=10)
+        # preallocated ring buffers; unused slots hold 0.0 so they add nothing to the sums
+        self.t, self.h = [0.0] * WINDOW, [0.0] * WINDOW
+        self.count = 0
+        self._idx = 0
+        # running sums of the buffers, so averages are O(1) per sample
+        self._sum_t = self._sum_h = 0.0
         self.avg_t = self.avg_h = 0.0
+        # averages pre-formatted for the GUI table
+        self.fmt_t = self.fmt_h = "0.00"
         self.last = "—"
         self.anom = 0
 
@@ -55,10 +110,19 @@ class Stats:
         update rolling averages, record timestamp, detect and count anomalies.
         Returns True if the reading is out-of-bounds (anomaly).
         """
-        self.t.append(tt)
-        self.h.append(hh)
-        self.avg_t = sum(self.t) / len(self.t)
-        self.avg_h = sum(self.h) / len(self.h)
+        i = self._idx
+        # slot i holds the oldest reading, which the new one replaces
+        self._sum_t += tt - self.t[i]
+        self._sum_h += hh - self.h[i]
+        self.t[i] = tt
+        self.h[i] = hh
+        self._idx = i + 1 if i + 1 < WINDOW else 0
+        if self.count < WINDOW:
+            self.count += 1
+        self.avg_t = self._sum_t / self.count
+        self.avg_h = self._sum_h / self.count
+        self.fmt_t = format(self.avg_t, ".2f")
+        self.fmt_h = format(self.avg_h, ".2f")
         self.last = ts[-8:]
         bad = not (TEMP_MIN <= tt <= TEMP_MAX and HUM_MIN <= hh <= HUM_MAX)
         if bad:
@@ -73,16 +137,21 @@ class GUI:
     GUI class using tkinter: displays sensor table, event log, and battery status bar.
     """
     def __init__(self, root: Tk, sensors, log_queue, listening_event):
+        self.root = root
         self.sensors, self.log_queue, self.listening_event = sensors, log_queue, listening_event
         self.batt = StringVar(root, "100 %")
+        # written by the battery thread, rendered by refresh()
+        self.battery_level = 100
 
         ttk.Label(root, text="Battery:").grid(
             row=0, column=0, sticky="w", padx=4)
         ttk.Label(root, textvariable=self.batt, width=14).grid(
             row=0, column=1, sticky="w")
 
-        ttk.Style(root).configure("Bar.TProgressbar",
-                                  troughcolor="black", background="green")
+        self._style = ttk.Style(root)
+        self._style.configure("Bar.TProgressbar",
+                              troughcolor="black", background="green")
+        self._last_colour = "green"
         self.pb = ttk.Progressbar(
             root, style="Bar.TProgressbar", length=200, maximum=100)
         self.pb.grid(row=0, column=2, padx=4)
@@ -93,102 +162,189 @@ class GUI:
             self.tbl.heading(c, text=c)
         self.tbl.grid(row=1, column=0, columnspan=3, padx=4, pady=4)
 
+        # last values pushed to the table, per sensor id
+        self._last_row = {}
+
         self.log = Text(root, height=9, state="disabled")
         self.log.grid(row=2, column=0, columnspan=3, padx=4, pady=4)
 
-        root.after(GUI_REFRESH_MS, self.refresh)
+        self.root.after(GUI_REFRESH_MS, self.refresh)
 
     def refresh(self):
         """
-        Periodically refresh the GUI: update sensor table, battery bar, and append new log entries.
+        Periodically refresh the GUI and reschedule itself on the root window,
+        even if this update failed.
+        """
+        try:
+            self.update_view()
+        except Exception as e:
+            self.log_queue.put(f"GUI refresh failed: {e}")
+        finally:
+            self.root.after(GUI_REFRESH_MS, self.refresh)
+
+    def update_view(self):
+        """
+        Update sensor table, battery bar, and append new log entries.
         """
         # update table
         for sid, st in self.sensors.items():
-            row = (sid, f"{st.avg_t:.2f}", f"{st.avg_h:.2f}", st.last, st.anom)
+            row = (sid, st.fmt_t, st.fmt_h, st.last, st.anom)
+            if self._last_row.get(sid) == row:
+                continue
+            self._last_row[sid] = row
             if self.tbl.exists(sid):
                 self.tbl.item(sid, values=row)
             else:
                 self.tbl.insert("", END, iid=sid, values=row)
 
         # battery display
-        battery_level = int(self.batt.get().split("%")[0])
+        battery_level = self.battery_level
         self.pb["value"] = battery_level
         colour = "green" if battery_level >= 50 else "yellow" if battery_level >= 25 else "red"
-        ttk.Style().configure("Bar.TProgressbar", background=colour)
+        # restyling touches every progress bar, so only do it on change
+        if colour != self._last_colour:
+            self._style.configure("Bar.TProgressbar", background=colour)
+            self._last_colour = colour
         mode = "RUNNING" if self.listening_event.is_set() else "CHARGING"
         self.batt.set(f"{battery_level}% ({mode})")
 
-        # log window
-        self.log.configure(state="normal")
-        while not self.log_queue.empty():
-            line = self.log_queue.get_nowait()
-            ts = datetime.now().strftime("%H:%M:%S")
-            self.log.insert(END, f"{ts}  {line}\n")
+        # log window: drain everything queued, then insert it in one go
+        lines = []
+        try:
+            while True:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            ts = ts_now()
+            self.log.configure(state="normal")
+            self.log.insert(END, "".join(f"{ts}  {line}\n" for line in lines))
             self.log.see(END)
-        self.log.configure(state="disabled")
-
-        self.log.after(GUI_REFRESH_MS, self.refresh)
+            self.log.configure(state="disabled")
 
 # listener thread
 
 
 def listener(listen_ip, listen_port, sensors, log_queue, send_avg, listening_event, stop_event):
     """
-    Listener thread: accepts TCP connections from sensor nodes, parses incoming JSON data,
-    updates sensor stats, logs events, and triggers send_avg for completed samples.
+    Listener thread: serves the listening socket and every sensor connection from one
+    selector loop, parses incoming JSON data, updates sensor stats, logs events,
+    and triggers send_avg for completed samples.
     """
-    def handle(conn):
-        sid = None
-        buf = b""
-        with conn:
-            while not stop_event.is_set() and listening_event.is_set():
-                data = conn.recv(1024)
-                if not data:
-                    break
-                buf += data
-                while b'\n' in buf:
-                    line, buf = buf.split(b'\n', 1)
-                    try:
-                        j = json.loads(line)
-                        sid = j["sensor_id"]
-                        t = float(j["temperature"])
-                        h = float(j["humidity"])
-                        ts = j["timestamp"]
-                    except Exception:
-                        continue
-                    st = sensors.setdefault(sid, Stats())
-                    warn = st.add(t, h, ts)
-                    log_queue.put(
-                        f"{sid}{' ⚠' if warn else ''} {t:.1f}°C {h:.1f}%")
-                    if len(st.t) == 10:
-                        send_avg(sid, st.avg_t, st.avg_h, st.anom)
-        if sid:
-            log_queue.put(f"{sid} disconnected")
+    sel = selectors.DefaultSelector()
+    rview = memoryview(bytearray(RECV_BUFSIZE))
+
+    def close(conn, state):
+        sel.unregister(conn)
+        conn.close()
+        if state["sid"]:
+            log_queue.put(f"{state['sid']} disconnected")
+
+    def handle(conn, state):
+        try:
+            n = conn.recv_into(rview)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            n = 0
+        if not n:
+            close(conn, state)
+            return
+        buf = state["buf"]
+        start = state["start"]
+        buf += rview[:n]
+        while True:
+            nl = buf.find(b'\n', start)
+            if nl < 0:
+                break
+            line = buf[start:nl]
+            start = nl + 1
+            try:
+                j = json_loads(line)
+                sid = j["sensor_id"]
+                t = float(j["temperature"])
+                h = float(j["humidity"])
+                ts = j["timestamp"]
+            except Exception:
+                continue
+            if not (isinstance(sid, str) and isinstance(ts, str)):
+                continue
+            # a NaN/inf would poison the running sums in Stats for good
+            if not (math.isfinite(t) and math.isfinite(h)):
+                continue
+            state["sid"] = sid
+            st = sensors.setdefault(sid, Stats())
+            warn = st.add(t, h, ts)
+            log_queue.put(
+                f"{sid}{' ⚠' if warn else ''} {t:.1f}°C {h:.1f}%")
+            if st.count == WINDOW:
+                send_avg(sid, st.avg_t, st.avg_h, st.anom)
+        # compact the buffer only once enough lines were consumed
+        if start > 4096:
+            del buf[:start]
+            start = 0
+        state["start"] = start
+
+    def close_all():
+        for key in list(sel.get_map().values()):
+            if key.data is not None:
+                close(key.fileobj, key.data)
 
     sock = None
+    # while accepting is backed off, the monotonic time to resume at
+    resume_accept = None
     while not stop_event.is_set():
         if listening_event.is_set() and sock is None:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             sock.bind((listen_ip, listen_port))
             sock.listen()
-            sock.settimeout(1)
+            sock.setblocking(False)
+            sel.register(sock, selectors.EVENT_READ)
             log_queue.put(f"Listener on {listen_ip}:{listen_port}")
         if not listening_event.is_set() and sock:
+            close_all()
+            if resume_accept is None:
+                sel.unregister(sock)
+            resume_accept = None
             sock.close()
             sock = None
             log_queue.put("Listener paused")
         if sock:
-            try:
-                conn, _ = sock.accept()
-                threading.Thread(target=handle, args=(
-                    conn,), daemon=True).start()
-            except socket.timeout:
-                pass
+            timeout = 1
+            if resume_accept is not None:
+                timeout = min(1, max(0.0, resume_accept - time.monotonic()))
+            for key, _ in sel.select(timeout=timeout):
+                if key.data is not None:
+                    # an error closes only this sensor's connection
+                    try:
+                        handle(key.fileobj, key.data)
+                    except Exception as e:
+                        log_queue.put(f"Sensor connection error: {e}")
+                        close(key.fileobj, key.data)
+                    continue
+                try:
+                    conn, _ = sock.accept()
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError as e:
+                    log_queue.put(f"Failed to accept sensor: {e}")
+                    # back off accepting only, connected sensors keep being served
+                    sel.unregister(sock)
+                    resume_accept = time.monotonic() + 1
+                    continue
+                conn.setblocking(False)
+                sel.register(conn, selectors.EVENT_READ,
+                             {"sid": None, "buf": bytearray(), "start": 0})
+            if resume_accept is not None and time.monotonic() >= resume_accept:
+                sel.register(sock, selectors.EVENT_READ)
+                resume_accept = None
         else:
             time.sleep(0.1)
+    close_all()
     if sock:
         sock.close()
+    sel.close()
 
 # sender / queue logic
 
@@ -207,18 +363,22 @@ def make_sender(server_ip, server_port, log_queue, charging_event, packet_queue)
         if charging_event.is_set():
             packet_queue.append(packet)
             return
-        message = json.dumps(packet) + "\n"
+        message = encode_line(packet)
         with lock:
             nonlocal sock
             if sock is None:
                 try:
                     sock = socket.create_connection((server_ip, server_port), timeout=2)
+                    tune_socket(sock)
                 except Exception as e:
                     log_queue.put(f"Central offline: {e}")
+                    if sock is not None:
+                        sock.close()
+                        sock = None
                     packet_queue.append(packet)
                     return
             try:
-                sock.sendall(message.encode())
+                sock.sendall(message)
             except Exception as e:
                 log_queue.put(f"Central lost: {e}")
                 sock.close()
@@ -229,18 +389,40 @@ def make_sender(server_ip, server_port, log_queue, charging_event, packet_queue)
 
 def flush_queue(server_ip, server_port, packet_queue, log_queue):
     """
-    Attempt to send all queued packets to the central server, stopping on failure.
+    Send all queued packets to the central server over a single connection.
+    Packets that were not written in full stay queued for the next attempt.
     """
-    while packet_queue:
-        packet = packet_queue.pop(0)
-        try:
-            with socket.create_connection((server_ip, server_port), timeout=2) as s:
-                s.sendall((json.dumps(packet) + "\n").encode())
-            log_queue.put("Queued summary sent")
-        except Exception as e:
-            log_queue.put(f"Still offline: {e}")
-            packet_queue.insert(0, packet)
+    # detach the batch first, so concurrent appends cannot shift it
+    batch = [packet_queue.popleft() for _ in range(len(packet_queue))]
+    if not batch:
+        return
+    lines = [encode_line(packet) for packet in batch]
+    payload = memoryview(b"".join(lines))
+    sent = 0
+    try:
+        with socket.create_connection((server_ip, server_port), timeout=2) as s:
+            tune_socket(s)
+            while sent < len(payload):
+                sent += s.send(payload[sent:])
+    except Exception as e:
+        log_queue.put(f"Still offline: {e}")
+
+    # count the packets that went out completely, requeue the rest in order
+    flushed = 0
+    for line in lines:
+        if sent < len(line):
             break
+        sent -= len(line)
+        flushed += 1
+    unsent = batch[flushed:]
+    # extendleft on a full deque would evict the newest packets; drop the oldest instead
+    if packet_queue.maxlen is not None:
+        room = packet_queue.maxlen - len(packet_queue)
+        if len(unsent) > room:
+            unsent = unsent[len(unsent) - room:]
+    packet_queue.extendleft(reversed(unsent))
+    if flushed:
+        log_queue.put(f"Queued summaries sent ({flushed})")
 
 # battery worker
 
@@ -255,7 +437,7 @@ def battery(gui, log_queue, listening_event, charging_event, packet_queue, serve
     while True:
         time.sleep(BATTERY_STEP_SEC if is_discharging else CHARGE_STEP_SEC)
         battery_level += -1 if is_discharging else +1
-        gui.batt.set(f"{battery_level}%")
+        gui.battery_level = battery_level
         if is_discharging and battery_level <= 15:
             is_discharging = False
             listening_event.clear()
@@ -289,7 +471,7 @@ def main():
     listening_event.set()
     stop_event = threading.Event()
     charging_event = threading.Event()
-    packet_queue = []
+    packet_queue = deque(maxlen=PACKET_QUEUE_MAX)
 
     root = Tk()
     root.title("Drone GUI")
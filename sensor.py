@@ -25,6 +25,7 @@ def sensor_loop(sensor_id, drone_ip, drone_port, interval):
     while True:
         try:
             s = socket.create_connection((drone_ip, drone_port), timeout=5)
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             print(f"[{sensor_id}] Connected to Drone at {drone_ip}:{drone_port}")
             while True:
                 data = generate_sensor_data(sensor_id)